@@ -1,5 +1,28 @@
 # SPDX-FileCopyrightText: 2023-present Wytamma Wirth <wytamma.wirth@me.com>
 #
 # SPDX-License-Identifier: MIT
-from env_exec.environments.conda import CondaEnv
-from env_exec.environments.mamba import MambaEnv
\ No newline at end of file
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from env_exec.environments.conda import CondaEnv
+    from env_exec.environments.mamba import MambaEnv
+
+# environments are imported on first access so the CLI starts without loading them
+_LAZY_IMPORTS = {
+    "CondaEnv": "env_exec.environments.conda",
+    "MambaEnv": "env_exec.environments.mamba",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
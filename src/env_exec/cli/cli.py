@@ -1,11 +1,23 @@
 import argparse
+import os
 import sys
 from typing import Any
 
-from env_exec.environments import CondaEnv, MambaEnv
+# environment classes in env_exec.environments, keyed by manager; looked up on use so `--help` stays fast
+MANAGERS = {
+    "conda": "CondaEnv",
+    "mamba": "MambaEnv",
+}
+# managers that are accepted on the command line but do not have an environment class yet
+PLANNED_MANAGERS = {
+    "docker": "DockerEnv",
+}
 
 
 class CLI:
+    # cached result of looking up a conda compatible mamba on the PATH
+    _mamba_available = None
+
     def __init__(self):
         self.manager = None
         self.env_name = None
@@ -20,7 +32,7 @@ class CLI:
         parser.add_argument(
             "manager",
             help="The package manager to use.",
-            choices=["conda", "mamba", "docker"],
+            choices=[*MANAGERS, *PLANNED_MANAGERS],
         )
         parser.add_argument(
             "-n",
@@ -59,6 +71,21 @@ class CLI:
             help="If True, missing dependencies will be installed.",
             action="store_true",
         )
+        parser.add_argument(
+            "--offline",
+            help="If True, packages will only be installed from the local package cache.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--no-mamba",
+            help="If True, conda will not be replaced by mamba when mamba is installed. "
+            "Can also be set with the ENV_EXEC_NO_MAMBA environment variable.",
+            action="store_true",
+        )
+        parser.add_argument(
+            "--lockfile",
+            help="An explicit lockfile (e.g. from conda-lock) to create the environment from.",
+        )
         parser.add_argument(
             "command",
             help="The command to execute.",
@@ -73,35 +100,62 @@ class CLI:
         self.verbose = args.verbose
         self.isolate = args.isolate
         self.install_missing = args.install_missing
+        self.offline = args.offline
+        self.lockfile = args.lockfile
+        self.use_mamba = not (args.no_mamba or os.environ.get("ENV_EXEC_NO_MAMBA"))
+
+    @classmethod
+    def mamba_available(cls):
+        """
+        Checks if a mamba that can stand in for conda is on the PATH. The lookup is only done once.
+        The version is taken from the `mamba` record in the `conda-meta` directory of its root prefix;
+        if there is no record, mamba is not used.
+
+        Only mamba 1.x is used: it forwards commands such as `run` to conda, whereas mamba 2.x
+        has its own command line that does not accept all of the arguments used for conda.
+
+        Returns:
+            bool: True if mamba is available, False otherwise.
+        """
+        if cls._mamba_available is None:
+            # read from the package records rather than `mamba --version`, which starts a Python process
+            from env_exec.environments.conda import manager_version
+
+            version = manager_version("mamba")
+            major = None if version is None else version.split(".")[0]
+            cls._mamba_available = major is not None and major.isdigit() and int(major) < 2
+        return cls._mamba_available
 
     def __call__(self):
         self.parse_args()
+        # imported here so `--help` does not have to load the environments
+        from env_exec import environments
+
         if self.verbose:
             self.capture_output = False
-        if self.manager == "conda":
-            env = CondaEnv(
-                self.env_name,
-                dependencies=self.dependencies,
-                channels=self.channels,
-                capture_output=self.capture_output,
-                install_missing=self.install_missing,
-            )
-        elif self.manager == "mamba":
-            env = MambaEnv(
-                self.env_name,
-                dependencies=self.dependencies,
-                channels=self.channels,
-                capture_output=self.capture_output,
-                install_missing=self.install_missing,
-            )
-        elif self.manager == "python":
-            msg = "PythonEnv is not implemented yet."
-            raise NotImplementedError(msg)
-        elif self.manager == "docker":
-            msg = "DockerEnv is not implemented yet."
-            raise NotImplementedError(msg)
-        else:
+        if self.manager == "conda" and self.use_mamba and self.mamba_available():
+            # mamba is a drop-in replacement for conda with a much faster solver
+            self.manager = "mamba"
+        env_class_name = MANAGERS.get(self.manager)
+        if env_class_name is None:
+            if self.manager in PLANNED_MANAGERS:
+                msg = f"{PLANNED_MANAGERS[self.manager]} is not implemented yet."
+                raise NotImplementedError(msg)
             msg = f"Unknown package manager: {self.manager}"
             raise ValueError(msg)
+        env = getattr(environments, env_class_name)(
+            self.env_name,
+            dependencies=self.dependencies,
+            channels=self.channels,
+            capture_output=self.capture_output,
+            install_missing=self.install_missing,
+            offline=self.offline,
+            lockfile=self.lockfile,
+        )
+        command = self.command
+        if len(command) <= 1:
+            # a single quoted argument is a command line, e.g. `envx conda 'echo $HOME | wc -c'`,
+            # which exec splits or runs in a shell as needed
+            command = " ".join(command)
         with env:
-            env.exec(" ".join(self.command), isolate=self.isolate)
+            env.exec(command, isolate=self.isolate)
@@ -1,11 +1,109 @@
-import json
+import glob
+import hashlib
+import os
+import shutil
 import subprocess
-import uuid
-from typing import List, Optional, Union
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
 
 from env_exec.environments.env import Env
 from env_exec.errors import CreateEnvError, ExecError, InstallPackageError, ManagerNotAvailable, MissingDependencyError
 
+try:
+    from orjson import loads
+except ImportError:  # no cov
+    from json import loads
+
+
+# characters that only a shell can interpret in a command string
+SHELL_METACHARACTERS = frozenset("|&;<>()$`\\\"'*?[]{}~#=\n")
+
+
+def requires_shell(command: str) -> bool:
+    """
+    Checks if a command string has to be run by a shell.
+
+    Args:
+        command (str): The command to check.
+
+    Returns:
+        bool: True if the command contains shell metacharacters, False otherwise.
+
+    Examples:
+        >>> requires_shell("python -V")
+        False
+        >>> requires_shell("echo $HOME | wc -c")
+        True
+    """
+    return any(char in SHELL_METACHARACTERS for char in command)
+
+
+def is_pinned(dependency: str) -> bool:
+    """
+    Checks if a dependency is pinned to an exact version.
+
+    Args:
+        dependency (str): The dependency spec.
+
+    Returns:
+        bool: True if the dependency has the form `name=version` or `name==version`, False otherwise.
+
+    Examples:
+        >>> is_pinned("numpy=1.26.0")
+        True
+        >>> is_pinned("numpy>=1.26")
+        False
+    """
+    name, _, version = dependency.partition("=")
+    version = version.lstrip("=")
+    return bool(name and version) and not name.endswith(("<", ">", "!", "~")) and not any(
+        char in version for char in "<>!*,|"
+    )
+
+
+def cache_dir() -> Path:
+    """
+    Gets the directory where env_exec keeps its cache.
+
+    Returns:
+        Path: `$ENV_EXEC_CACHE_DIR` if set, otherwise `env_exec` in `$XDG_CACHE_HOME` (default `~/.cache`).
+    """
+    if os.environ.get("ENV_EXEC_CACHE_DIR"):
+        return Path(os.environ["ENV_EXEC_CACHE_DIR"])
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "env_exec"
+
+
+@lru_cache(maxsize=None)
+def _which(manager: str):
+    """
+    Resolves the full path of the manager executable. The lookup is only done once per manager.
+    """
+    return shutil.which(manager)
+
+
+@lru_cache(maxsize=None)
+def _root_prefix(manager: str):
+    """
+    Finds the root (base) prefix of the manager without running it. The lookup is only done once per manager.
+
+    Returns:
+        Optional[str]: The root prefix, or None if it cannot be determined.
+    """
+    candidates = []
+    if manager == "mamba":
+        candidates.append(os.environ.get("MAMBA_ROOT_PREFIX"))
+    # executables live in <root>/bin or <root>/condabin
+    for executable in (os.environ.get("MAMBA_EXE" if manager == "mamba" else "CONDA_EXE"), _which(manager)):
+        if executable:
+            candidates.append(os.path.dirname(os.path.dirname(os.path.realpath(executable))))
+    for candidate in candidates:
+        if candidate and os.path.isdir(os.path.join(candidate, "conda-meta")):
+            return candidate
+    return None
+
 
 class CondaEnv(Env):
     """
@@ -22,6 +120,8 @@ class CondaEnv(Env):
         clean_up: bool = False,
         install_missing: bool = False,
         capture_output: bool = False,
+        offline: bool = False,
+        lockfile: Optional[str] = None,
         manager: str = "conda",
     ):
         """
@@ -30,29 +130,99 @@ class CondaEnv(Env):
         Args:
             name (str, optional): The name of the environment. If not provided, a random name will be generated.
             dependencies (list[str], optional): A list of dependencies to install in the environment.
+            channels (list[str], optional): The channels to install the dependencies from, in order of priority.
             force (bool, optional): If True, the environment will be recreated even if it already exists.
             check (bool, optional): If True, the environment will be checked for missing dependencies.
             clean_up (bool, optional): If True, the environment will be deleted when the context manager exits.
             install_missing (bool, optional): If True, missing dependencies will be installed.
-            capture_output (bool, optional): If True, the output of the commands will be captured.
+            capture_output (bool, optional): If True, the output of the commands run by the context manager
+                will be hidden.
+            offline (bool, optional): If True, packages will only be installed from the local package cache.
+            lockfile (str, optional): An explicit lockfile to create the environment from, e.g. produced by
+                `conda-lock` or `conda list --explicit`.
             mamba (bool, optional): If True, mamba will be used as the package manager.
         """
         if dependencies is None:
             dependencies = []
         if name is None:
             # create random id for env name
-            name = "env_exec_" + str(uuid.uuid4()).replace("-", "")[:8]
+            import secrets
+
+            name = f"env_exec_{secrets.token_hex(4)}"
             clean_up = True
-        self.name = name
+        self._name = name
+        self._manager = manager
+        self._update_argv()
         self.dependencies = dependencies
+        self._dep_parsed = None
         self.channels = channels
         self.force = force
         self.check = check
         self.clean_up = clean_up
         self.capture_output = capture_output
         self.install_missing = install_missing
-        self.manager = manager
+        self.offline = offline
+        self.lockfile = lockfile
         self.output = None
+        self._env_list_cache = None
+        self._installed_cache = None
+
+    @property
+    def name(self):
+        """
+        The name of the environment.
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name: str):
+        self._name = name
+        self._update_argv()
+
+    @property
+    def manager(self):
+        """
+        The package manager of the environment.
+        """
+        return self._manager
+
+    @manager.setter
+    def manager(self, manager: str):
+        self._manager = manager
+        self._update_argv()
+
+    def _update_argv(self):
+        """
+        Builds the argument prefixes of the commands that target this environment. They are rebuilt
+        whenever the name or the manager changes.
+        """
+        self._create_argv_prefix = (self.manager, "create", "--name", self.name, "--no-default-packages")
+        self._install_argv_prefix = (self.manager, "install", "--name", self.name)
+        self._list_argv = (self.manager, "list", "--name", self.name, "--json")
+        self._delete_argv = (self.manager, "env", "remove", "--name", self.name, "--yes")
+        self._exec_argv_prefix = (self.manager, "run", "--live-stream", "--name", self.name)
+
+    def _parsed_dependencies(self):
+        """
+        Parses each dependency spec into a name and a version.
+
+        The result is kept as parallel tuples and only recomputed when the dependencies change,
+        including changes made to the list in place.
+
+        Returns:
+            Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]: The specs, names and versions.
+        """
+        specs = tuple(self.dependencies)
+        if self._dep_parsed is None or self._dep_parsed[0] != specs:
+            names = []
+            versions = []
+            for spec in specs:
+                name, _, version = spec.partition("=")
+                names.append(name[4:] if name.startswith("pip:") else name)
+                # `name==version` pins the same version as `name=version`
+                versions.append(version.lstrip("="))
+            self._dep_parsed = (specs, tuple(names), tuple(versions))
+        return self._dep_parsed
 
     def __enter__(self):
         """
@@ -63,24 +233,55 @@ class CondaEnv(Env):
 
         Raises:
             MissingDependencyError: If check is True and there are missing dependencies and install_missing is False.
+
+        Notes:
+            Dependencies are only checked for environments that already existed or were created from
+            a lockfile. Once an environment has been set up, a marker file for its manager, dependencies
+            and channels is written to the cache directory, and later runs with the same settings skip
+            the checks entirely.
         """
-        if not self.available:
-            msg = f"{self.manager} is not available"
-            raise ManagerNotAvailable(msg)
-        if self.force or not self.exists:
-            self.output = self.create(capture_output=self.capture_output)
+        if not self.force and self._marker_path().is_file() and self._find_prefix() is not None:
+            # the environment was already set up with these exact dependencies
+            return self
+        # the availability check and the environment lookup are independent, so run them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            available = executor.submit(lambda: self.available)
+            if self.force:
+                lookup = None
+            elif self.check:
+                # listing the packages also tells whether the environment exists
+                lookup = executor.submit(self._list_or_missing)
+            else:
+                lookup = executor.submit(lambda: (self.exists, None))
+            if not available.result():
+                msg = f"{self.manager} is not available"
+                raise ManagerNotAvailable(msg)
+            exists, installed_packages = (False, None) if lookup is None else lookup.result()
+        if not exists:
+            self.output = self.create(quiet=self.capture_output)
+            if not (self.lockfile and self.dependencies):
+                # the environment is created with all of the dependencies in a single solve,
+                # so there is nothing to check or install afterwards
+                self._write_marker()
+                return self
+            # the lockfile decides the contents, so the dependencies still have to be checked
+            installed_packages = None
         if self.check:
             try:
-                missing_dependencies = self.get_missing_dependencies()
+                if installed_packages is None:
+                    installed_packages = self._installed_packages()
+                missing_dependencies = self._missing_dependencies(installed_packages)
                 if not missing_dependencies:
+                    self._write_marker()
                     return self
                 elif self.install_missing:
-                    self.install(missing_dependencies, capture_output=self.capture_output)
+                    self.install(missing_dependencies, quiet=self.capture_output)
+                    self._write_marker()
                 else:
                     raise MissingDependencyError(missing_dependencies)
             except Exception as e:
                 if self.clean_up:
-                    self.delete(capture_output=True)
+                    self.delete(quiet=True)
                 raise e
 
         return self
@@ -98,7 +299,90 @@ class CondaEnv(Env):
             If clean_up is True, the environment will be deleted.
         """
         if self.clean_up:
-            self.output = self.delete(capture_output=self.capture_output)
+            self.output = self.delete(quiet=self.capture_output)
+
+    def _marker_path(self):
+        """
+        Gets the path of the marker file that records this environment as set up.
+
+        Returns:
+            Path: The marker path, named after the environment and a hash of its manager, dependencies,
+                channels and lockfile, so changing any of them invalidates the marker.
+        """
+        settings = (self.manager, sorted(self.dependencies), sorted(self.channels or []), self._lockfile_digest())
+        key = hashlib.blake2b(repr(settings).encode(), digest_size=16).hexdigest()
+        return cache_dir() / f"{self.name}-{key}.ok"
+
+    def _lockfile_digest(self):
+        """
+        Hashes the contents of the lockfile.
+
+        Returns:
+            Optional[str]: The digest, or None if there is no lockfile or it cannot be read.
+        """
+        if not self.lockfile:
+            return None
+        try:
+            return hashlib.blake2b(Path(self.lockfile).read_bytes(), digest_size=16).hexdigest()
+        except OSError:
+            return None
+
+    def _write_marker(self):
+        """
+        Writes the marker file of the environment. Ephemeral environments are not recorded.
+        """
+        if self.clean_up:
+            return
+        marker = self._marker_path()
+        try:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            tmp = marker.with_name(f"{marker.name}.{os.getpid()}.tmp")
+            tmp.touch()
+            os.replace(tmp, marker)
+        except OSError:
+            # the marker is only an optimisation
+            pass
+
+    def _remove_markers(self):
+        """
+        Removes all marker files of the environment.
+        """
+        # the hash is 32 hex characters, so markers of e.g. `<name>-other` are not matched
+        for marker in cache_dir().glob(glob.escape(self.name) + "-" + "?" * 32 + ".ok"):
+            try:
+                marker.unlink()
+            except OSError:
+                pass
+
+    def _run(self, args: Sequence[str], **kwargs):
+        """
+        Runs a manager command.
+
+        The manager is executed by its full path and file descriptors are not closed (Python's own
+        descriptors are non-inheritable), which lets CPython launch it with `posix_spawn` instead of
+        fork and exec.
+
+        Args:
+            args (Sequence[str]): The command to run, starting with the manager.
+            **kwargs: Keyword arguments passed to `subprocess.run`.
+
+        Returns:
+            CompletedProcess: The CompletedProcess object of the command.
+        """
+        return subprocess.run(args, executable=_which(args[0]), close_fds=False, **kwargs)
+
+    def _quiet_run(self, args: Sequence[str], **kwargs):
+        """
+        Runs a manager command and discards its output rather than buffering it in memory.
+
+        Args:
+            args (Sequence[str]): The command to run, starting with the manager.
+            **kwargs: Keyword arguments passed to `subprocess.run`.
+
+        Returns:
+            CompletedProcess: The CompletedProcess object of the command, without stdout or stderr.
+        """
+        return self._run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
 
     @property
     def exists(self):
@@ -107,12 +391,119 @@ class CondaEnv(Env):
 
         Returns:
             bool: True if the environment exists, False otherwise.
+
+        Notes:
+            The environment directories on disk and `~/.conda/environments.txt` are checked first.
+            Only if the environment is not found there is `conda env list` run, and its result is
+            cached until the environment is created or deleted.
         """
-        completed_process = subprocess.run(
-            [self.manager, "env", "list", "--json"], capture_output=True, text=True, check=True
-        )
-        env_data = json.loads(completed_process.stdout)
-        return self.name in [env.split("/")[-1] for env in env_data["envs"]]
+        if self._find_prefix() is not None:
+            return True
+        if self._env_list_cache is not None:
+            return False
+        completed_process = self._run([self.manager, "env", "list", "--json"], capture_output=True, check=True)
+        env_data = loads(completed_process.stdout)
+        self._env_list_cache = env_data["envs"]
+        return self._match_env(self._env_list_cache) is not None
+
+    def _find_prefix(self):
+        """
+        Finds the prefix of the environment without running the manager.
+
+        The default environment directories (`<root>/envs` and `~/.conda/envs`) are checked first,
+        then the environments registered in `~/.conda/environments.txt` and in the cached
+        `conda env list` output.
+
+        Returns:
+            Optional[str]: The path of the environment, or None if it is not found.
+        """
+        envs_dirs = [os.path.expanduser(os.path.join("~", ".conda", "envs"))]
+        root_prefix = _root_prefix(self.manager)
+        if root_prefix is not None:
+            envs_dirs.insert(0, os.path.join(root_prefix, "envs"))
+        for envs_dir in envs_dirs:
+            prefix = os.path.join(envs_dir, self.name)
+            if os.path.isfile(os.path.join(prefix, "conda-meta", "history")):
+                return prefix
+        prefix = self._match_env(self._read_environments_txt())
+        if prefix is None and self._env_list_cache is not None:
+            prefix = self._match_env(self._env_list_cache)
+        return prefix
+
+    @staticmethod
+    def _read_environments_txt():
+        """
+        Reads the environment paths registered in `~/.conda/environments.txt`.
+
+        Returns:
+            List[str]: The registered environment paths that still exist, or an empty list if the file
+                cannot be read.
+        """
+        try:
+            lines = Path("~/.conda/environments.txt").expanduser().read_text().splitlines()
+        except OSError:
+            return []
+        return [line for line in lines if line and Path(line).is_dir()]
+
+    def _match_env(self, envs: List[str]):
+        """
+        Finds the environment path that belongs to this environment.
+
+        Args:
+            envs (list[str]): The environment paths to search.
+
+        Returns:
+            Optional[str]: The path ending with the environment name, or None if there is none.
+        """
+        for env in envs:
+            if env.rstrip("/").split("/")[-1] == self.name:
+                return env
+        return None
+
+    def _conda_meta_dir(self):
+        """
+        Finds the `conda-meta` directory of the environment.
+
+        Returns:
+            Optional[str]: The path of the directory, or None if the environment prefix is unknown or
+                pip dependencies have to be checked (pip packages are not recorded in conda-meta).
+        """
+        if any(spec.startswith("pip:") for spec in self.dependencies):
+            return None
+        prefix = self._find_prefix()
+        if prefix is None:
+            return None
+        return os.path.join(prefix, "conda-meta")
+
+    @staticmethod
+    def _read_conda_meta(conda_meta: str):
+        """
+        Reads the installed packages from a `conda-meta` directory.
+
+        Package records are named `<name>-<version>-<build>.json`, so the names and versions are
+        taken from the file names without opening the files.
+
+        Args:
+            conda_meta (str): The path of the `conda-meta` directory.
+
+        Returns:
+            Optional[Dict[str, str]]: The installed package versions keyed by name, or None if the
+                directory cannot be read.
+        """
+        installed_packages = {}
+        try:
+            with os.scandir(conda_meta) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        name, version, _build = entry.name[:-5].rsplit("-", 2)
+                    except ValueError:
+                        continue
+                    installed_packages[name] = version
+        except OSError:
+            return None
+        return installed_packages
 
     @property
     def available(self):
@@ -120,7 +511,7 @@ class CondaEnv(Env):
         Check if manager (conda) is available.
         """
         try:
-            subprocess.run(
+            self._run(
                 [self.manager, "--version"],
                 check=True,
                 capture_output=True,
@@ -130,77 +521,134 @@ class CondaEnv(Env):
         except subprocess.CalledProcessError:
             return False
 
-    def create(self, *, capture_output: bool = False):
+    def create(self, *, capture_output: bool = False, quiet: bool = False):
         """
         Creates the environment.
 
         Args:
             capture_output (bool, optional): If True, the output of the commands will be captured.
+            quiet (bool, optional): If True, the output of the commands will be discarded.
 
         Returns:
             CompletedProcess: The CompletedProcess object of the command.
+
+        Notes:
+            If a lockfile is set, the environment is created from it with `--no-deps`, bypassing the
+            solver. The dependencies and channels are not used.
         """
-        cmd = [self.manager, "create", "--name", self.name]
-        if self.channels:
-            for channel in self.channels:
-                cmd += ["--channel", channel]
-        cmd += [*self.dependencies, "--yes"]
+        if self.lockfile:
+            cmd = [*self._create_argv_prefix, "--file", self.lockfile, "--no-deps"]
+            packages = []
+        else:
+            cmd = [*self._create_argv_prefix, *self._channel_args()]
+            packages = self.dependencies
+        self._env_list_cache = None
+        # the contents of the environment change, so no earlier marker can be trusted
+        self._remove_markers()
         try:
-            return subprocess.run(
-                cmd,
-                check=True,
-                capture_output=capture_output,
-                text=True,
-            )
+            return self._solve(cmd, packages, capture_output=capture_output, quiet=quiet)
         except subprocess.CalledProcessError:
             msg = "\n\n---"
-            msg += f"\n\nError Creating Environment: \n{self.manager} create --name {self.name} {' '.join(self.dependencies)}"
+            msg += f"\n\nError Creating Environment: \n{' '.join([*cmd, *packages])}"
             msg += "\n(look at the top of the traceback above for more information)"
             raise CreateEnvError(msg) from None
 
-    def install(self, package: Union[List[str], str], *, capture_output: bool = False):
+    def install(self, package: Union[List[str], str], *, capture_output: bool = False, quiet: bool = False):
         """
         Installs a package(s) in the environment.
 
         Args:
             package (str, list): The package to install.
             capture_output (bool, optional): If True, the output of the commands will be captured.
+            quiet (bool, optional): If True, the output of the commands will be discarded.
 
         Returns:
             CompletedProcess: The CompletedProcess object of the command.
         """
         if isinstance(package, str):
             package = [package]
-        cmd = [self.manager, "install", "--name", self.name]
-        if self.channels:
-            for channel in self.channels:
-                cmd += ["--channel", channel]
-        cmd += [*package, "--yes"]
+        cmd = [*self._install_argv_prefix, *self._channel_args()]
+        self._remove_markers()
         try:
-            return subprocess.run(
-                cmd,
-                check=True,
-                capture_output=capture_output,
-                text=True,
-            )
+            return self._solve(cmd, package, capture_output=capture_output, quiet=quiet)
         except subprocess.CalledProcessError:
             msg = "\n\n---"
             msg += f"\n\nError Installing Package(s): \n{self.manager} install --name {self.name} {' '.join(package)}"
             msg += "\n(look at the top of the traceback above for more information)"
             raise InstallPackageError(msg) from None
 
-    def delete(self, *, capture_output: bool = False):
+    def _solve(self, cmd: List[str], packages: List[str], *, capture_output: bool = False, quiet: bool = False):
+        """
+        Runs a create or install command, avoiding repodata downloads where possible.
+
+        If offline is True the command is run with `--offline`. Otherwise, if every package is pinned
+        to an exact version, the cached channel index is used with `--use-index-cache`. Should that
+        fail (e.g. the cache predates the pinned versions), the command is retried with a fresh index.
+        The errors of the first attempt are only shown if it succeeds.
+
+        Args:
+            cmd (list[str]): The command without the packages.
+            packages (list[str]): The packages to install.
+            capture_output (bool, optional): If True, the output of the commands will be captured.
+            quiet (bool, optional): If True, the output of the commands will be discarded.
+
+        Returns:
+            CompletedProcess: The CompletedProcess object of the command.
+
+        Raises:
+            CalledProcessError: If the command fails.
+        """
+        run = self._quiet_run if quiet else self._run
+        output = {} if quiet else {"capture_output": capture_output, "text": True}
+        if self.offline:
+            cmd = [*cmd, "--offline"]
+        elif packages and all(is_pinned(package) for package in packages):
+            # stdout streams as usual, but stderr (where conda reports errors) is held back so that a
+            # failure that is retried is not shown
+            first_output = output if quiet or capture_output else {"stderr": subprocess.PIPE, "text": True}
+            try:
+                completed_process = run([*cmd, "--use-index-cache", *packages, "--yes"], check=True, **first_output)
+            except subprocess.CalledProcessError:
+                pass
+            else:
+                if not quiet and not capture_output:
+                    sys.stderr.write(completed_process.stderr)
+                return completed_process
+        return run([*cmd, *packages, "--yes"], check=True, **output)
+
+    def _channel_args(self):
+        """
+        Builds the channel arguments for the create and install commands.
+
+        Returns:
+            List[str]: A `--channel` argument for each channel, followed by `--strict-channel-priority`
+                so the solver only considers packages from the highest priority channel that has them.
+        """
+        if not self.channels:
+            return []
+        args = []
+        for channel in self.channels:
+            args += ["--channel", channel]
+        args.append("--strict-channel-priority")
+        return args
+
+    def delete(self, *, capture_output: bool = False, quiet: bool = False):
         """
         Deletes the environment.
 
         Args:
             capture_output (bool, optional): If True, the output of the commands will be captured.
+            quiet (bool, optional): If True, the output of the commands will be discarded.
 
         Returns:
             CompletedProcess: The CompletedProcess object of the command.
         """
-        return subprocess.run(
-            [self.manager, "env", "remove", "--name", self.name, "--yes"],
+        self._env_list_cache = None
+        self._remove_markers()
+        if quiet:
+            return self._quiet_run(self._delete_argv, check=True)
+        return self._run(
+            self._delete_argv,
             check=True,
             capture_output=capture_output,
             text=True,
@@ -226,31 +674,89 @@ class CondaEnv(Env):
             >>> env.get_missing_dependencies()
             ["numpy=1.18.1"]
         """
-        completed_process = subprocess.run(
-            [self.manager, "list", "--name", self.name, "--json"], capture_output=True, text=True, check=True
-        )
-        installed_packages = {package["name"]:package["version"] for package in json.loads(completed_process.stdout)}
+        return self._missing_dependencies(self._installed_packages())
+
+    def _missing_dependencies(self, installed_packages: Dict[str, str]):
+        """
+        Finds the dependencies that are not satisfied by the installed packages.
+
+        Args:
+            installed_packages (dict[str, str]): The installed package versions keyed by name.
+
+        Returns:
+            List[str]: The missing dependencies.
+        """
         missing = []
-        for dependency in self.dependencies:
-            try:
-                name, version = dependency.split("=")
-            except ValueError:
-                name = dependency
-                version = None
-            name = name[4:] if name.startswith("pip:") else name
+        for spec, name, version in zip(*self._parsed_dependencies()):
             if name in installed_packages:
                 if version and version != installed_packages[name]:
-                    missing.append(dependency)
+                    missing.append(spec)
             else:
-                missing.append(dependency)
+                missing.append(spec)
         return missing
 
-    def exec(self, command: str, *, capture_output: bool = False, isolate: bool = False):
+    def _installed_packages(self):
+        """
+        Gets the packages installed in the environment.
+
+        The packages are read from `conda-meta` when the environment prefix is known, and cached
+        until the directory changes. Otherwise `conda list` is run.
+
+        Returns:
+            Dict[str, str]: The installed package versions keyed by name.
+
+        Raises:
+            CalledProcessError: If `conda list` fails, e.g. because the environment does not exist.
+        """
+        conda_meta = self._conda_meta_dir()
+        if conda_meta is not None:
+            try:
+                key = (self.name, os.stat(conda_meta).st_mtime_ns)
+            except OSError:
+                pass
+            else:
+                # conda-meta changes whenever a package is added or removed
+                if self._installed_cache is not None and self._installed_cache[0] == key:
+                    return self._installed_cache[1]
+                installed_packages = self._read_conda_meta(conda_meta)
+                if installed_packages is not None:
+                    self._installed_cache = (key, installed_packages)
+                    return installed_packages
+        # the JSON output is parsed from bytes, there is no need to decode it first
+        completed_process = self._run(self._list_argv, capture_output=True, check=True)
+        return {package["name"]: package["version"] for package in loads(completed_process.stdout)}
+
+    def _list_or_missing(self):
+        """
+        Checks if the environment exists and gets its installed packages in one go.
+
+        Listing the packages of an environment that does not exist fails, so a single lookup
+        answers both questions. A failed listing is only taken to mean the environment does not
+        exist if its prefix cannot be found on disk either.
+
+        Returns:
+            Tuple[bool, Optional[Dict[str, str]]]: (True, installed packages) if the environment
+                exists, (False, None) otherwise.
+
+        Raises:
+            CalledProcessError: If listing the packages of an existing environment fails.
+        """
+        try:
+            return True, self._installed_packages()
+        except (subprocess.CalledProcessError, ValueError):
+            if self._find_prefix() is not None:
+                # creating the environment now would replace it
+                raise
+            return False, None
+
+    def exec(self, command: Union[List[str], str], *, capture_output: bool = False, isolate: bool = False):
         """
         Executes a command in the environment.
 
         Args:
-            command (str): The command to execute.
+            command (str, list): The command to execute. A list is run directly as an argument vector.
+                A string is run with `bash -c` if it contains shell metacharacters, otherwise it is split
+                on whitespace and run directly.
             capture_output (bool, optional): If True, the output of the commands will be captured.
             isolate (bool, optional): If True, the command will be executed in a isolated shell.
 
@@ -264,25 +770,56 @@ class CondaEnv(Env):
             >>> with CondaEnv(name="my_env") as env:
             ...   env.exec("echo 'Hello World!'")
             Hello World!
+            >>> with CondaEnv(name="my_env") as env:
+            ...   env.exec(["echo", "Hello World!"])
+            Hello World!
         """
+        if isinstance(command, str):
+            argv = None if requires_shell(command) else command.split() or None
+        else:
+            argv = list(command)
         if isolate:
-            completed_process = subprocess.run(
+            completed_process = self._run(
                 [self.manager, "info", "--envs"], capture_output=True, text=True, check=True
             )
             for line in completed_process.stdout.split("\n"):
                 if line.startswith(self.name):
                     env_path = line.split()[-1]
-                    command = f"PATH={env_path}/bin {command}"
+                    if argv is None:
+                        command = f"PATH={env_path}/bin {command}"
+                    else:
+                        argv = ["env", f"PATH={env_path}/bin", *argv]
                     break
+        if argv is None:
+            argv = ["bash", "-c", command]
         try:
-            return subprocess.run(
-                [self.manager, "run", "--live-stream", "--name", self.name, "bash", "-c", command],
+            return self._run(
+                [*self._exec_argv_prefix, *argv],
                 check=True,
                 capture_output=capture_output,
                 text=True,
             )
         except subprocess.CalledProcessError:
             msg = "\n\n---"
-            msg += f"\n\nError Running Command: \n{command}"
+            msg += f"\n\nError Running Command: \n{command if isinstance(command, str) else ' '.join(command)}"
             msg += "\n(look at the top of the traceback above for more information)"
             raise ExecError(msg) from None
+
+
+def manager_version(manager: str) -> Optional[str]:
+    """
+    Reads the version of a manager from the `conda-meta` records of its root prefix, without running it.
+
+    Args:
+        manager (str): The manager, e.g. `mamba`.
+
+    Returns:
+        Optional[str]: The installed version, or None if the root prefix or the record cannot be found.
+    """
+    root_prefix = _root_prefix(manager)
+    if root_prefix is None:
+        return None
+    installed_packages = CondaEnv._read_conda_meta(os.path.join(root_prefix, "conda-meta"))
+    if installed_packages is None:
+        return None
+    return installed_packages.get(manager)
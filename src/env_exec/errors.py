@@ -4,12 +4,7 @@ Custom errors for env_exec
 
 # EnvExecError
 class EnvExecError(Exception):
-    """Base class for exceptions in this module."""
-    pass
-
-# ExecError
-class ExecError(EnvExecError):
-    """Exception raised for errors in the execution of a command.
+    """Base class for exceptions in this module.
 
     Attributes:
         message -- explanation of the error
@@ -17,117 +12,57 @@ class ExecError(EnvExecError):
 
     def __init__(self, message):
         """
-        Initializes an ExecError object.
+        Initializes an EnvExecError object.
 
         Args:
             message (str): Explanation of the error.
 
         Returns:
-            ExecError: An ExecError object.
+            EnvExecError: An EnvExecError object.
 
         Examples:
-            >>> raise ExecError('Error in command execution.')
-            ExecError: Error in command execution.
+            >>> raise EnvExecError('Error in env_exec.')
+            EnvExecError: Error in env_exec.
         """
         self.message = message
         super().__init__(self.message)
 
-# MissingDependencyError
-class MissingDependencyError(EnvExecError):
+# ExecError
+class ExecError(EnvExecError):
     """Exception raised for errors in the execution of a command.
 
     Attributes:
         message -- explanation of the error
     """
 
-    def __init__(self, message):
-        """
-        Initializes a MissingDependencyError object.
-
-        Args:
-            message (str): Explanation of the error.
-
-        Returns:
-            MissingDependencyError: A MissingDependencyError object.
+# MissingDependencyError
+class MissingDependencyError(EnvExecError):
+    """Exception raised when dependencies are missing from an environment.
 
-        Examples:
-            >>> raise MissingDependencyError('Missing dependency.')
-            MissingDependencyError: Missing dependency.
-        """
-        self.message = message
-        super().__init__(self.message)
+    Attributes:
+        message -- explanation of the error
+    """
 
 # CreateEnvError
 class CreateEnvError(EnvExecError):
-    """Exception raised for errors in the execution of a command.
+    """Exception raised for errors in the creation of an environment.
 
     Attributes:
         message -- explanation of the error
     """
 
-    def __init__(self, message):
-        """
-        Initializes a CreateEnvError object.
-
-        Args:
-            message (str): Explanation of the error.
-
-        Returns:
-            CreateEnvError: A CreateEnvError object.
-
-        Examples:
-            >>> raise CreateEnvError('Error creating environment.')
-            CreateEnvError: Error creating environment.
-        """
-        self.message = message
-        super().__init__(self.message)
-
 # InstallPackageError
 class InstallPackageError(EnvExecError):
-    """Exception raised for errors in the execution of a command.
+    """Exception raised for errors in the installation of a package.
 
     Attributes:
         message -- explanation of the error
     """
 
-    def __init__(self, message):
-        """
-        Initializes an InstallPackageError object.
-
-        Args:
-            message (str): Explanation of the error.
-
-        Returns:
-            InstallPackageError: An InstallPackageError object.
-
-        Examples:
-            >>> raise InstallPackageError('Error installing package.')
-            InstallPackageError: Error installing package.
-        """
-        self.message = message
-        super().__init__(self.message)
-
 # ManagerNotAvailable
 class ManagerNotAvailable(EnvExecError):
-    """Exception raised for errors in the execution of a command.
+    """Exception raised when the environment manager is not available.
 
     Attributes:
         message -- explanation of the error
     """
-
-    def __init__(self, message):
-        """
-        Initializes a ManagerNotAvailable object.
-
-        Args:
-            message (str): Explanation of the error.
-
-        Returns:
-            ManagerNotAvailable: A ManagerNotAvailable object.
-
-        Examples:
-            >>> raise ManagerNotAvailable('Manager not available.')
-            ManagerNotAvailable: Manager not available.
-        """
-        self.message = message
-        super().__init__(self.message)
\ No newline at end of file
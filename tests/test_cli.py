@@ -0,0 +1,77 @@
+# SPDX-FileCopyrightText: 2023-present Wytamma Wirth <wytamma.wirth@me.com>
+#
+# SPDX-License-Identifier: MIT
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from env_exec.cli.cli import CLI
+
+
+@pytest.fixture
+def mock_envs():
+    with patch("env_exec.environments.CondaEnv") as mock_conda, patch(
+        "env_exec.environments.MambaEnv"
+    ) as mock_mamba, patch.object(CLI, "mamba_available", return_value=False):
+        yield mock_conda, mock_mamba
+
+
+def run_cli(*argv):
+    with patch.object(sys, "argv", ["envx", *argv]):
+        CLI()()
+
+
+def exec_command(mock_env):
+    return mock_env.return_value.exec.call_args[0][0]
+
+
+@pytest.mark.parametrize(
+    "argv,expected",
+    [
+        (["python", "-V"], ["python", "-V"]),
+        (["python", "-c", "print(1)"], ["python", "-c", "print(1)"]),
+        (["python -V"], "python -V"),
+        (["echo $HOME | wc -c"], "echo $HOME | wc -c"),
+        ([], ""),
+    ],
+)
+def test_cli_command(argv, expected, mock_envs):
+    mock_conda, _ = mock_envs
+    run_cli("conda", *argv)
+    assert exec_command(mock_conda) == expected
+
+
+def test_cli_docker_not_implemented(mock_envs):
+    with pytest.raises(NotImplementedError):
+        run_cli("docker", "ls")
+
+
+def test_cli_prefers_mamba(mock_envs):
+    mock_conda, mock_mamba = mock_envs
+    with patch.object(CLI, "mamba_available", return_value=True):
+        run_cli("conda", "python", "-V")
+    mock_mamba.assert_called_once()
+    mock_conda.assert_not_called()
+
+
+@pytest.mark.parametrize("argv,environ", [(["--no-mamba"], {}), ([], {"ENV_EXEC_NO_MAMBA": "1"})])
+def test_cli_no_mamba(argv, environ, mock_envs, monkeypatch):
+    mock_conda, mock_mamba = mock_envs
+    for key, value in environ.items():
+        monkeypatch.setenv(key, value)
+    with patch.object(CLI, "mamba_available", return_value=True):
+        run_cli(*argv, "conda", "python", "-V")
+    mock_conda.assert_called_once()
+    mock_mamba.assert_not_called()
+
+
+@pytest.mark.parametrize("version,expected", [("1.5.8", True), ("2.0.5", False), (None, False)])
+def test_cli_mamba_available_cached(version, expected):
+    with patch.object(CLI, "_mamba_available", None), patch(
+        "env_exec.environments.conda.manager_version", return_value=version
+    ) as mock_version, patch("subprocess.run") as mock_run:
+        assert CLI.mamba_available() is expected
+        assert CLI.mamba_available() is expected
+        mock_version.assert_called_once_with("mamba")
+        mock_run.assert_not_called()
@@ -1,11 +1,18 @@
 import json
+import re
 import subprocess
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 import pytest
 
-from env_exec.environments.conda import CondaEnv
-from env_exec.errors import ExecError
+from env_exec.environments.conda import CondaEnv, manager_version
+from env_exec.errors import ExecError, ManagerNotAvailable, MissingDependencyError
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ENV_EXEC_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
 
 
 @pytest.fixture
@@ -16,6 +23,8 @@ def conda_env():
 @pytest.fixture
 def mock_subprocess_run():
     with patch("subprocess.run") as mock_run:
+        mock_run.return_value.stdout = ""
+        mock_run.return_value.stderr = ""
         yield mock_run
 
 
@@ -27,10 +36,16 @@ def test_conda_env_init(conda_env):
     assert not conda_env.clean_up
 
 
+def test_conda_env_random_name():
+    env = CondaEnv()
+    assert re.fullmatch(r"env_exec_[0-9a-f]{8}", env.name)
+    assert env.clean_up
+
+
 def test_conda_env_exists(conda_env, mock_subprocess_run):
     mock_subprocess_run.return_value.stdout = json.dumps(
         {"envs": ["/path/to/test_env"]}
-    )
+    ).encode()
     assert conda_env.exists
 
 
@@ -52,7 +67,9 @@ def test_conda_env_check_missing(conda_env, mock_subprocess_run):
 
 
 def test_conda_env_check_dependencies_missing(conda_env: CondaEnv, mock_subprocess_run):
-    mock_subprocess_run.return_value.stdout = json.dumps([{"name": "numpy", "version": "1"}, {"name": "pandas", "version": "1"}])
+    mock_subprocess_run.return_value.stdout = json.dumps(
+        [{"name": "numpy", "version": "1"}, {"name": "pandas", "version": "1"}]
+    ).encode()
     assert conda_env.get_missing_dependencies() == ["pandas=2.0.0"]
 
 
@@ -61,6 +78,20 @@ def test_conda_env_exec(conda_env, mock_subprocess_run):
     mock_subprocess_run.assert_called_once()
 
 
+def test_conda_env_exec_argv(conda_env, mock_subprocess_run):
+    conda_env.exec(["echo", "Hello World!"])
+    assert mock_subprocess_run.call_args[0][0] == [
+        "conda", "run", "--live-stream", "--name", "test_env", "echo", "Hello World!"
+    ]
+
+
+def test_conda_env_exec_shell(conda_env, mock_subprocess_run):
+    conda_env.exec("python -V")
+    assert mock_subprocess_run.call_args[0][0][-2:] == ["python", "-V"]
+    conda_env.exec("echo $HOME | wc -c")
+    assert mock_subprocess_run.call_args[0][0][-3:] == ["bash", "-c", "echo $HOME | wc -c"]
+
+
 def test_conda_env_exec_error(conda_env, mock_subprocess_run):
     mock_subprocess_run.side_effect = subprocess.CalledProcessError(1, "ls")
     with pytest.raises(ExecError):
@@ -68,18 +99,38 @@ def test_conda_env_exec_error(conda_env, mock_subprocess_run):
 
 
 @pytest.mark.parametrize(
-    "force,exists,expected_calls",
-    [(True, False, 4), (False, True, 3), (False, False, 3)],
+    "force,exists,expected_commands",
+    [
+        (True, True, ["--version", "create"]),
+        (False, True, ["--version", "install"]),
+        (False, False, ["--version", "create"]),
+    ],
 )
-def test_conda_env_enter(force, exists, expected_calls, conda_env, mock_subprocess_run):
+def test_conda_env_enter(force, exists, expected_commands, conda_env, mock_subprocess_run):
     conda_env.force = force
     conda_env.install_missing = True
-    mock_subprocess_run.return_value.stdout = json.dumps([{"name": "numpy", "version": "1"}, {"name": "pandas", "version": "1"}])
-    # mock exists property
-    with patch("env_exec.CondaEnv.exists") as mock_exists:
-        mock_exists.return_value.stdout = json.dumps({"envs": ["/path/to/test_env"]})
+    installed_packages = {"numpy": "1", "pandas": "1"} if exists else None
+    with patch.object(CondaEnv, "_list_or_missing", return_value=(exists, installed_packages)) as mock_lookup:
         with conda_env:
-            assert mock_subprocess_run.call_count == expected_calls
+            commands = sorted(call[0][0][1] for call in mock_subprocess_run.call_args_list)
+            assert commands == expected_commands
+    assert mock_lookup.called != force
+
+
+def test_conda_env_enter_list_fails_existing_env(conda_env, mock_subprocess_run):
+    def run(args, **kwargs):
+        if args[1] == "list":
+            raise subprocess.CalledProcessError(1, args)
+        return mock_subprocess_run.return_value
+
+    mock_subprocess_run.side_effect = run
+    conda_env.dependencies = ["pip:requests"]
+    with patch.object(CondaEnv, "_find_prefix", return_value="/path/to/test_env"):
+        with pytest.raises(subprocess.CalledProcessError):
+            with conda_env:
+                pass
+    called = [call[0][0][1] for call in mock_subprocess_run.call_args_list]
+    assert "create" not in called
 
 
 def test_conda_env_exit(conda_env, mock_subprocess_run):
@@ -96,7 +147,12 @@ def test_conda_env_channels(conda_env, mock_subprocess_run):
     conda_env.channels = ["conda-forge"]
     conda_env.create()
     mock_subprocess_run.assert_called_once_with(
-        ["conda", "create", "--name", "test_env", "--channel", "conda-forge", "numpy", "pandas=2.0.0", "--yes"],
+        [
+            "conda", "create", "--name", "test_env", "--no-default-packages",
+            "--channel", "conda-forge", "--strict-channel-priority", "numpy", "pandas=2.0.0", "--yes",
+        ],
+        executable=ANY,
+        close_fds=False,
         capture_output=False,
         check=True,
         text=True,
@@ -105,3 +161,206 @@ def test_conda_env_channels(conda_env, mock_subprocess_run):
 def test_conda_env_available(conda_env, mock_subprocess_run):
     mock_subprocess_run.return_value.stdout = "conda 4.9.2"
     assert conda_env.available
+
+
+def test_conda_env_exists_environments_txt(conda_env, mock_subprocess_run):
+    with patch.object(CondaEnv, "_read_environments_txt", return_value=["/path/to/test_env"]):
+        assert conda_env.exists
+    mock_subprocess_run.assert_not_called()
+
+
+def test_conda_env_exists_cached(conda_env, mock_subprocess_run):
+    mock_subprocess_run.return_value.stdout = json.dumps({"envs": ["/path/to/other_env"]})
+    with patch.object(CondaEnv, "_read_environments_txt", return_value=[]):
+        assert not conda_env.exists
+        assert not conda_env.exists
+        mock_subprocess_run.assert_called_once()
+        conda_env.create()
+        mock_subprocess_run.return_value.stdout = json.dumps({"envs": ["/path/to/test_env"]})
+        assert conda_env.exists
+
+
+def test_conda_env_check_conda_meta(conda_env, mock_subprocess_run, tmp_path):
+    conda_meta = tmp_path / "test_env" / "conda-meta"
+    conda_meta.mkdir(parents=True)
+    (conda_meta / "numpy-1.26.0-py311h64a7726_0.json").write_text("{}")
+    (conda_meta / "pandas-2.0.0-py311h320fe9a_0.json").write_text("{}")
+    (conda_meta / "history").write_text("")
+    with patch.object(CondaEnv, "_read_environments_txt", return_value=[str(tmp_path / "test_env")]):
+        assert conda_env.get_missing_dependencies() == []
+    mock_subprocess_run.assert_not_called()
+
+
+def test_conda_env_enter_not_available(conda_env, mock_subprocess_run):
+    with patch.object(CondaEnv, "available", new=False):
+        with pytest.raises(ManagerNotAvailable):
+            with conda_env:
+                pass
+
+
+def test_conda_env_create_pinned_uses_index_cache(mock_subprocess_run):
+    env = CondaEnv("test_env", dependencies=["numpy=1.26.0", "pandas==2.0.0"])
+    mock_subprocess_run.return_value = subprocess.CompletedProcess([], 0, stdout="", stderr="")
+    env.create()
+    assert "--use-index-cache" in mock_subprocess_run.call_args[0][0]
+
+
+def test_conda_env_create_pinned_retries_without_index_cache(mock_subprocess_run):
+    env = CondaEnv("test_env", dependencies=["numpy=1.26.0"])
+    mock_subprocess_run.side_effect = [subprocess.CalledProcessError(1, "conda"), None]
+    env.create()
+    assert mock_subprocess_run.call_count == 2
+    first, second = mock_subprocess_run.call_args_list
+    assert first[1]["stderr"] == subprocess.PIPE
+    assert "stdout" not in first[1]
+    assert "capture_output" not in first[1]
+    assert not second[1]["capture_output"]
+    assert "--use-index-cache" not in second[0][0]
+
+
+def test_conda_env_create_offline(conda_env, mock_subprocess_run):
+    conda_env.offline = True
+    conda_env.create()
+    assert "--offline" in mock_subprocess_run.call_args[0][0]
+    assert "--use-index-cache" not in mock_subprocess_run.call_args[0][0]
+
+
+def test_conda_env_dependencies_parsed(conda_env):
+    conda_env.dependencies = ["numpy", "pandas=2.0.0", "pip:requests=2.31.0"]
+    _, names, versions = conda_env._parsed_dependencies()
+    assert names == ("numpy", "pandas", "requests")
+    assert versions == ("", "2.0.0", "2.31.0")
+
+
+def test_conda_env_dependencies_appended(conda_env):
+    conda_env.dependencies = ["numpy"]
+    assert conda_env._missing_dependencies({"numpy": "1"}) == []
+    conda_env.dependencies.append("pandas=2.0.0")
+    assert conda_env._missing_dependencies({"numpy": "1"}) == ["pandas=2.0.0"]
+
+
+def test_conda_env_check_conda_meta_cached(conda_env, mock_subprocess_run, tmp_path):
+    conda_meta = tmp_path / "test_env" / "conda-meta"
+    conda_meta.mkdir(parents=True)
+    (conda_meta / "numpy-1.26.0-py311h64a7726_0.json").write_text("{}")
+    with patch.object(CondaEnv, "_read_environments_txt", return_value=[str(tmp_path / "test_env")]):
+        assert conda_env.get_missing_dependencies() == ["pandas=2.0.0"]
+        with patch.object(CondaEnv, "_read_conda_meta") as mock_read:
+            assert conda_env.get_missing_dependencies() == ["pandas=2.0.0"]
+            mock_read.assert_not_called()
+
+
+def test_conda_env_exists_envs_dir(conda_env, mock_subprocess_run, tmp_path):
+    conda_meta = tmp_path / "envs" / "test_env" / "conda-meta"
+    conda_meta.mkdir(parents=True)
+    (conda_meta / "history").write_text("")
+    with patch("env_exec.environments.conda._root_prefix", return_value=str(tmp_path)):
+        assert conda_env.exists
+    mock_subprocess_run.assert_not_called()
+
+
+def test_conda_env_enter_creates_when_list_fails(conda_env, mock_subprocess_run):
+    def run(args, **kwargs):
+        if args[1] == "list":
+            raise subprocess.CalledProcessError(1, args)
+        return mock_subprocess_run.return_value
+
+    mock_subprocess_run.side_effect = run
+    with conda_env:
+        pass
+    called = [call[0][0][1] for call in mock_subprocess_run.call_args_list]
+    assert sorted(called) == ["--version", "create", "list"]
+
+
+def test_conda_env_enter_marker(conda_env, mock_subprocess_run, cache_dir):
+    conda_env.install_missing = True
+    mock_subprocess_run.return_value.stdout = json.dumps([{"name": "numpy", "version": "1"}])
+    with patch.object(CondaEnv, "_find_prefix", return_value="/path/to/test_env"):
+        with conda_env:
+            pass
+        assert len(list(cache_dir.glob("test_env-*.ok"))) == 1
+        mock_subprocess_run.reset_mock()
+        with conda_env:
+            pass
+        mock_subprocess_run.assert_not_called()
+        conda_env.dependencies = ["numpy", "pandas=2.1.0"]
+        assert not conda_env._marker_path().is_file()
+        conda_env.delete()
+    assert not list(cache_dir.glob("test_env-*.ok"))
+
+
+def test_conda_env_create_lockfile(conda_env, mock_subprocess_run):
+    conda_env.lockfile = "conda-linux-64.lock"
+    conda_env.create()
+    assert mock_subprocess_run.call_args[0][0] == [
+        "conda", "create", "--name", "test_env", "--no-default-packages",
+        "--file", "conda-linux-64.lock", "--no-deps", "--yes",
+    ]
+
+
+def test_conda_env_enter_quiet(conda_env, mock_subprocess_run):
+    conda_env.force = True
+    conda_env.capture_output = True
+    with conda_env:
+        pass
+    kwargs = mock_subprocess_run.call_args[1]
+    assert kwargs["stdout"] == subprocess.DEVNULL
+    assert kwargs["stderr"] == subprocess.DEVNULL
+    assert "capture_output" not in kwargs
+
+
+def test_conda_env_force_recreate_invalidates_markers(mock_subprocess_run, cache_dir):
+    mock_subprocess_run.return_value.stdout = json.dumps([{"name": "numpy", "version": "1"}])
+    with patch.object(CondaEnv, "_find_prefix", return_value="/path/to/x"):
+        with CondaEnv("x", dependencies=["numpy"]):
+            pass
+        with CondaEnv("x", dependencies=["scipy"], force=True):
+            pass
+        assert len(list(cache_dir.glob("x-*.ok"))) == 1
+        mock_subprocess_run.reset_mock()
+        mock_subprocess_run.return_value.stdout = json.dumps([{"name": "scipy", "version": "1"}])
+        with pytest.raises(MissingDependencyError):
+            with CondaEnv("x", dependencies=["numpy"]):
+                pass
+        assert mock_subprocess_run.called
+
+
+def test_conda_env_enter_lockfile_checks_dependencies(conda_env, mock_subprocess_run):
+    conda_env.lockfile = "conda-linux-64.lock"
+    conda_env.force = True
+    mock_subprocess_run.return_value.stdout = json.dumps([{"name": "numpy", "version": "1"}])
+    with pytest.raises(MissingDependencyError):
+        with conda_env:
+            pass
+
+
+def test_conda_env_rename(conda_env, mock_subprocess_run):
+    conda_env.name = "other_env"
+    conda_env.manager = "mamba"
+    conda_env.delete()
+    assert mock_subprocess_run.call_args[0][0] == ("mamba", "env", "remove", "--name", "other_env", "--yes")
+
+
+def test_conda_env_delete_keeps_other_markers(mock_subprocess_run, cache_dir):
+    env = CondaEnv("foo")
+    other = CondaEnv("foo-bar")
+    env._write_marker()
+    other._write_marker()
+    env.delete()
+    assert not env._marker_path().is_file()
+    assert other._marker_path().is_file()
+
+
+def test_manager_version(tmp_path):
+    conda_meta = tmp_path / "conda-meta"
+    conda_meta.mkdir()
+    (conda_meta / "mamba-1.5.8-py311h3072747_0.json").write_text("{}")
+    with patch("env_exec.environments.conda._root_prefix", return_value=str(tmp_path)):
+        assert manager_version("mamba") == "1.5.8"
+        assert manager_version("conda") is None
+
+
+def test_conda_env_missing_double_equals_pin(conda_env):
+    conda_env.dependencies = ["pandas==2.0.0"]
+    assert conda_env._missing_dependencies({"pandas": "2.0.0"}) == []
+    assert conda_env._missing_dependencies({"pandas": "1.5.3"}) == ["pandas==2.0.0"]